@@ -34,11 +34,18 @@ def parse_var_name(name: str):
 def pick_input_nc(requested: Path) -> Path:
     if requested.exists():
         return requested
-    fallback = Path("cal_yld_RES05-YCX.nc")
-    if fallback.exists():
-        logging.warning(f"Input {requested} not found, using {fallback} instead")
-        return fallback
-    raise FileNotFoundError(f"Input NetCDF not found: {requested}")
+    for fallback in (Path("cal_yld_RES05-YCX.zarr"), Path("cal_yld_RES05-YCX.nc")):
+        if fallback.exists():
+            logging.warning(f"Input {requested} not found, using {fallback} instead")
+            return fallback
+    raise FileNotFoundError(f"Input dataset not found: {requested}")
+
+
+def open_input(path: Path) -> xr.Dataset:
+    # process_data.py writes a Zarr store; older runs produced NetCDF
+    if path.suffix == ".zarr":
+        return xr.open_zarr(path.as_posix())
+    return xr.open_dataset(path.as_posix())
 
 
 def collect_entries(ds: xr.Dataset):
@@ -333,7 +340,7 @@ def write_report(out_dir: Path, by_water: dict, input_nc: Path):
     report.append("")
     report.append("## Setup")
     report.append("")
-    report.append(f"- Input NetCDF: {input_nc}")
+    report.append(f"- Input dataset: {input_nc}")
     report.append("- Units transformed to people-fed-yearly by dividing all cal_yld values by 730")
     report.append("- Baseline mask: HP8100 > 0")
     report.append("- Deltas: HP0120-HP8100 and FP2140-HP8100")
@@ -376,7 +383,7 @@ def write_report(out_dir: Path, by_water: dict, input_nc: Path):
 
 def main():
     parser = argparse.ArgumentParser(description="Analyze calorie-yield delta maps from NetCDF.")
-    parser.add_argument("--input", default="cal_yld_RES06-YCX.nc", help="Input NetCDF path")
+    parser.add_argument("--input", default="cal_yld_RES06-YCX.nc", help="Input NetCDF or Zarr path")
     parser.add_argument("--outdir", default="outputs/analysis_cal_yld", help="Output directory")
     args = parser.parse_args()
 
@@ -386,7 +393,7 @@ def main():
     out_dir = Path(args.outdir)
     out_dir.mkdir(parents=True, exist_ok=True)
 
-    ds = xr.open_dataset(input_nc.as_posix())
+    ds = open_input(input_nc)
     entries = collect_entries(ds)
     if not entries:
         raise RuntimeError("No matching cal_yld variables found in input dataset")
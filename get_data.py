@@ -1,5 +1,6 @@
 from src.utils import (sum_groups_kcal, get_crop_mapping, get_cal_mapper,
-                       gaezv5_path, preload_har_cache, check_urls_exist)
+                       gaezv5_path, preload_har_cache, check_urls_exist,
+                       prefetch_rasters, write_raster, write_rasters)
 from pathlib import Path
 import logging
 import xarray as xr
@@ -54,6 +55,25 @@ def _build_yield_urls(yield_var, crop_mapping, calorie_mapping):
     return urls
 
 
+def lazy_kcal(yield_var, period, model, scen, water, crop_mapping, cal_map_t6,
+              har_cache=None, url_manifest=None):
+    """Lazy kcal DataArray for one (period, model, scen, water) combination."""
+    da: xr.DataArray = sum_groups_kcal(
+        crop_mapping=crop_mapping,
+        calorie_mapping=cal_map_t6,
+        water_code=water,
+        variable_code_yield=yield_var,
+        period=period,
+        climate_model=model,
+        scenario=scen,
+        har_cache=har_cache,
+        url_manifest=url_manifest,
+      )
+    da.attrs.setdefault("units", "kcal")
+    da.attrs.setdefault("source", "GAEZ v5")
+    return da
+
+
 def run():
 
     logging.basicConfig(level=getattr(logging, LOGLEVEL), format="%(levelname)s: %(message)s")
@@ -73,8 +93,15 @@ def run():
 
         yield_urls = _build_yield_urls(yield_var, crop_mapping, cal_map_t6)
         url_manifest = check_urls_exist(yield_urls)
+        prefetch_rasters(url_manifest)
         # ─────────────────────────────────────────────────────────────
 
+        # Build every combination lazily, then compute them all in one threaded
+        # graph: the shared har_cache area tiles are read once for all
+        # combinations. Together with prefetch_rasters (parallel downloads up
+        # front) this replaces the former per-combination LocalCluster runner,
+        # whose processes could not share the area tiles or the open writers.
+        outputs = {}
         for (period, model, scen) in valid_combos():
             for water in WATERS:
 
@@ -86,37 +113,30 @@ def run():
 
                 logging.info(f"Building {fname} …")
                 try:
-                    da: xr.DataArray = sum_groups_kcal(
-                        crop_mapping=crop_mapping,
-                        calorie_mapping=cal_map_t6,
-                        water_code=water,
-                        variable_code_yield=yield_var,
-                        period=period,
-                        climate_model=model,
-                        scenario=scen,
-                        har_cache=har_cache,
-                        url_manifest=url_manifest,
-                      )
-                    da = da.astype("float32")
-                    rname = da.name or fname
-                    out_path = outdir_var /f"{rname}.tif"
-                    da = da.astype("float32")
-                    da.attrs.setdefault("units", "kcal")
-                    da.attrs.setdefault("source", "GAEZ v5")
-
-                    da.rio.to_raster(
-                      out_path.as_posix(),
-                      tiled=True, BLOCKXSIZE=512, BLOCKYSIZE=512,
-                      NUM_THREADS="ALL_CPUS",
-                      windowed=True, BIGTIFF="IF_SAFER",
-                      dtype="float32", SPARSE_OK=True,      # <— skips all-zero tiles
-                      compress="ZSTD",        # here had no compression before
-                      ZSTD_LEVEL=5
-                    )
-                    logging.info(f"Saved {out_path}")
+                    da = lazy_kcal(yield_var, period, model, scen, water,
+                                   crop_mapping, cal_map_t6,
+                                   har_cache=har_cache, url_manifest=url_manifest)
+                    outputs[outdir_var / f"{da.name or fname}.tif"] = da
                 except Exception as e:
                     logging.exception(f"Failed {fname}: {e}")
 
+        if not outputs:
+            continue
+        logging.info(f"Computing and writing {len(outputs)} rasters …")
+        try:
+            write_rasters(list(outputs.values()), list(outputs))
+            for out_path in outputs:
+                logging.info(f"Saved {out_path}")
+        except Exception as e:
+            # One bad combination must not cost the others: retry one by one.
+            logging.warning(f"Shared write failed ({e}); writing outputs one by one …")
+            for out_path, da in outputs.items():
+                try:
+                    write_raster(da, out_path)
+                    logging.info(f"Saved {out_path}")
+                except Exception as e:
+                    logging.exception(f"Failed {out_path.stem}: {e}")
+
 
 if __name__ == "__main__":
   run()
\ No newline at end of file
@@ -9,6 +9,7 @@ from src.utils import (
     gaezv5_path,
     preload_har_cache,
     check_urls_exist,
+    write_raster,
 )
 
 OUTDIR = Path("outputs/cal_yld_by_group")
@@ -83,8 +84,9 @@ def run():
             logging.warning(f"No valid crop groups found for {yield_var}, skipping")
             continue
 
-        # Pre-build caches once per yield_var
-        har_cache = preload_har_cache(groups, WATERS)
+        # Pre-build caches once per yield_var. Every group's area feeds one
+        # separate compute per combination, so keep the decoded areas in memory.
+        har_cache = preload_har_cache(groups, WATERS, persist=True)
 
         yield_urls = _build_yield_urls(yield_var, crop_mapping, groups)
         url_manifest = check_urls_exist(yield_urls)
@@ -118,19 +120,7 @@ def run():
                         da.attrs.setdefault("source", "GAEZ v5")
                         da.attrs.setdefault("crop_group", group)
 
-                        da.rio.to_raster(
-                            out_path.as_posix(),
-                            tiled=True,
-                            BLOCKXSIZE=512,
-                            BLOCKYSIZE=512,
-                            NUM_THREADS="ALL_CPUS",
-                            windowed=True,
-                            BIGTIFF="IF_SAFER",
-                            dtype="float32",
-                            SPARSE_OK=True,
-                            compress="ZSTD",
-                            ZSTD_LEVEL=5,
-                        )
+                        write_raster(da, out_path)
                         logging.info(f"Saved {out_path}")
                     except Exception as exc:
                         logging.exception(f"Failed {fname}: {exc}")
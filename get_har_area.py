@@ -1,4 +1,4 @@
-from src.utils import get_cal_mapper, gaezv5_path, open_raster
+from src.utils import get_cal_mapper, gaezv5_path, open_raster, grid_key, match_grid, write_raster
 from pathlib import Path
 import logging
 import xarray as xr
@@ -38,8 +38,9 @@ def sum_groups_har_area(groups, water_code):
     """
     area_water = YR_WATER_TO_AREA[water_code]
     
-    area_layers = []
+    total_area = None
     ref = None
+    ref_key = None
     
     for group in groups:
         a_path = gaezv5_path(
@@ -56,20 +57,20 @@ def sum_groups_har_area(groups, water_code):
             logging.warning(f"Skipping group={group} ({water_code}) – failed to open: {a_path} -> {e}")
             continue
         
-        # Reproject to match reference if needed
+        # Reproject to match reference if needed; the ref grid is read once
         if ref is None:
             ref = areaG
+            ref_key = grid_key(ref)
         else:
-            if (areaG.rio.crs != ref.rio.crs) or (areaG.rio.transform() != ref.rio.transform()) or (areaG.shape != ref.shape):
-                areaG = areaG.rio.reproject_match(ref)
+            areaG = match_grid(areaG, ref, ref_key)
         
-        area_layers.append(areaG.astype("float64"))
+        # Running sum avoids building a (group, y, x) array
+        areaG = areaG.fillna(0)  # open_raster already returns float32
+        total_area = areaG if total_area is None else total_area + areaG
     
-    if not area_layers:
+    if total_area is None:
         raise ValueError(f"No valid area layers found for water_code={water_code}")
     
-    # Sum across all groups
-    total_area = xr.concat(area_layers, dim="group").sum("group", skipna=True)
     total_area.name = f"har_area_{water_code}"
     return total_area
 
@@ -102,19 +103,7 @@ def run():
             da.attrs.setdefault("units", "ha")
             da.attrs.setdefault("source", "GAEZ v5")
 
-            da.rio.to_raster(
-                out_path.as_posix(),
-                tiled=True,
-                BLOCKXSIZE=512,
-                BLOCKYSIZE=512,
-                NUM_THREADS="ALL_CPUS",
-                windowed=True,
-                BIGTIFF="IF_SAFER",
-                dtype="float32",
-                SPARSE_OK=True,
-                compress="ZSTD",
-                ZSTD_LEVEL=5,
-            )
+            write_raster(da, out_path)
             logging.info(f"Saved {out_path}")
         except Exception as e:
             logging.exception(f"Failed {fname}: {e}")
@@ -2,7 +2,7 @@ from pathlib import Path
 import logging
 import xarray as xr
 
-from src.utils import get_cal_mapper, preload_har_cache, YR_WATER_TO_AREA
+from src.utils import get_cal_mapper, preload_har_cache, write_raster, YR_WATER_TO_AREA
 
 OUTDIR = Path("outputs/har_area_by_group")
 WATERS = ["HILM", "HRLM"]
@@ -53,19 +53,7 @@ def run():
                 da.attrs.setdefault("source", "GAEZ v5")
                 da.attrs.setdefault("crop_group", group)
 
-                da.rio.to_raster(
-                    out_path.as_posix(),
-                    tiled=True,
-                    BLOCKXSIZE=512,
-                    BLOCKYSIZE=512,
-                    NUM_THREADS="ALL_CPUS",
-                    windowed=True,
-                    BIGTIFF="IF_SAFER",
-                    dtype="float32",
-                    SPARSE_OK=True,
-                    compress="ZSTD",
-                    ZSTD_LEVEL=5,
-                )
+                write_raster(da, out_path)
                 logging.info(f"Saved {out_path}")
             except Exception as exc:
                 logging.exception(f"Failed {fname}: {exc}")
@@ -1,5 +1,6 @@
 from src.utils import (sum_groups_kcal, get_crop_mapping, get_cal_mapper,
-                       gaezv5_path, preload_har_cache, check_urls_exist)
+                       gaezv5_path, preload_har_cache, check_urls_exist,
+                       write_raster)
 from pathlib import Path
 import logging
 import xarray as xr
@@ -93,22 +94,12 @@ def run():
                         har_cache=har_cache,
                         url_manifest=url_manifest,
                       )
-                    da = da.astype("float32")
                     rname = da.name or fname
                     out_path = outdir_var /f"{rname}.tif"
-                    da = da.astype("float32")
                     da.attrs.setdefault("units", "kcal")
                     da.attrs.setdefault("source", "GAEZ v5")
 
-                    da.rio.to_raster(
-                      out_path.as_posix(),
-                      tiled=True, BLOCKXSIZE=512, BLOCKYSIZE=512,
-                      NUM_THREADS="ALL_CPUS",
-                      windowed=True, BIGTIFF="IF_SAFER",
-                      dtype="float32", SPARSE_OK=True,      # <— skips all-zero tiles
-                      compress="ZSTD",        # here had no compression before
-                      ZSTD_LEVEL=5
-                    )
+                    write_raster(da, out_path)
                     logging.info(f"Saved {out_path}")
                 except Exception as e:
                     logging.exception(f"Failed {fname}: {e}")
@@ -4,6 +4,8 @@ import re
 import xarray as xr
 import rioxarray as rxr
 
+from src.utils import clamp_to_zero, open_local_raster
+
 
 # ---------- CONFIG (edit) ----------
 FOLDER = Path("outputs/cal_yld_by_group/RES05-YCX")
@@ -26,8 +28,7 @@ WATER_ORDER = ["HILM", "HRLM", "LILM", "LRLM"]
 
 
 def open_tif_local(path: Path):
-    da = rxr.open_rasterio(path.as_posix(), masked=True, chunks=OPEN_CHUNKS).squeeze()
-    return da.astype("float32")
+    return open_local_raster(path, OPEN_CHUNKS)
 
 
 def _order_values(values, preferred_order):
@@ -100,7 +101,7 @@ def build_multidim_dataset(records, clamp_negatives=True) -> xr.Dataset:
             da = da.rio.reproject_match(ref)
 
         if clamp_negatives:
-            da = da.where(da >= 0, 0).astype("float32")
+            da = clamp_to_zero(da)
 
         da = da.expand_dims(
             scenario=[rec["scenario"]],
@@ -1,21 +1,28 @@
 # scripts/make_har_area_dataset_from_tifs.py
 from pathlib import Path
+import numcodecs
 import xarray as xr
 import rioxarray as rxr
 
+from src.utils import (block_aligned_chunks, clamp_to_zero, grid_key, match_grid,
+                       open_local_raster)
+
 # ---------- CONFIG (edit) ----------
 FOLDER = Path("outputs/har_area")
 PREFIX = "har_area"                     # loads FOLDER / f"{PREFIX}_*.tif"
-OUT_NC = Path(f"{PREFIX}.nc")           # NetCDF output
+OUT_ZARR = Path(f"{PREFIX}.zarr")       # Zarr store output
 CLAMP_NEGATIVES = True                  # set <0 to 0
 # -----------------------------------
 
 OPEN_CHUNKS = {"y": 256, "x": 256}      # keep or remove if you want full in-RAM
+# 320x320 float32 = 400 KB per chunk, just above ZSTD's 256 KB parameter tier
+ZARR_CHUNKS = {"y": 320, "x": 320}
+# zstd + byte shuffle (the Blosc analogue of a float predictor)
+ZARR_COMPRESSOR = numcodecs.Blosc(cname="zstd", clevel=5, shuffle=numcodecs.Blosc.SHUFFLE)
 
 
 def open_tif_local(path: Path):
-    da = rxr.open_rasterio(path.as_posix(), masked=True, chunks=OPEN_CHUNKS).squeeze()
-    return da.astype("float32")
+    return open_local_raster(path, OPEN_CHUNKS)
 
 
 def build_dataset_for_har_area(folder: Path, variable_prefix: str, clamp_negatives=True) -> xr.Dataset:
@@ -43,20 +50,27 @@ def build_dataset_for_har_area(folder: Path, variable_prefix: str, clamp_negativ
     # reference grid from first file
     ref = open_tif_local(files[0])
     ref_crs = ref.rio.crs
-    ref_tx = ref.rio.transform()
-    ref_shp = ref.shape
-
-    data_vars = {}
-    for f in files:
-        da = open_tif_local(f)
-        # align to ref if needed (should already match)
-        if (da.rio.crs != ref_crs) or (da.rio.transform() != ref_tx) or (da.shape != ref_shp):
-            da = da.rio.reproject_match(ref)
-        if clamp_negatives:
-            da = da.where(da >= 0, 0).astype("float32")   # clamp <0 to 0
-        data_vars[f.stem] = da
+    ref_key = grid_key(ref)
 
-    ds = xr.Dataset(data_vars).assign_coords(x=ref.x, y=ref.y)
+    def _preprocess(file_ds: xr.Dataset) -> xr.Dataset:
+        # one file -> one variable named after the file stem
+        da = file_ds["band_data"].squeeze("band", drop=True).astype("float32")
+        da = match_grid(da, ref, ref_key)   # align to ref if needed (should already match)
+        if clamp_negatives:
+            da = clamp_to_zero(da)   # clamp <0 to 0
+        return da.to_dataset(name=Path(file_ds.encoding["source"]).stem)
+
+    # header reads of all files run in parallel via dask.delayed
+    ds = xr.open_mfdataset(
+        [p.as_posix() for p in files],
+        engine="rasterio",
+        chunks=block_aligned_chunks(files[0], OPEN_CHUNKS),
+        parallel=True,
+        combine="nested",
+        concat_dim=None,         # merge the per-file variables, no concat
+        preprocess=_preprocess,
+    )
+    ds = ds.assign_coords(x=ref.x, y=ref.y)
     ds.rio.write_crs(ref_crs, inplace=True)
 
     # nicer CF-ish coord names for portability
@@ -83,11 +97,13 @@ def main():
     ds = build_dataset_for_har_area(FOLDER, PREFIX, clamp_negatives=CLAMP_NEGATIVES)
     print(ds)
 
-    # save NetCDF (portable single file)
-    enc = {v: {"zlib": True, "complevel": 4, "dtype": "float32", "chunksizes": (256, 256)}
+    # save Zarr: chunks are written concurrently, no global HDF5 write lock
+    ds = ds.chunk(ZARR_CHUNKS)  # dask chunks must line up with zarr chunks
+    enc = {v: {"dtype": "float32", "compressor": ZARR_COMPRESSOR,
+               "chunks": (ZARR_CHUNKS["y"], ZARR_CHUNKS["x"])}
            for v in ds.data_vars}
-    ds.to_netcdf(OUT_NC.as_posix(), engine="netcdf4", encoding=enc)
-    print(f"wrote: {OUT_NC}")
+    ds.to_zarr(OUT_ZARR.as_posix(), mode="w", encoding=enc)
+    print(f"wrote: {OUT_ZARR}")
 
 
 if __name__ == "__main__":
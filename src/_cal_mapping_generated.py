@@ -0,0 +1,102 @@
+# Generated by tools/gen_cal_mapping.py from data/gaezv5_cal_mapping.csv and
+# data/gaez_v5_crop_mapper.csv -- do not edit by hand; rerun the generator instead.
+
+CAL_MAPPER = {
+    "BAN": 3940,
+    "BRL": 3910,
+    "CSV": 3970,
+    "CON": 6680,
+    "GRD": 6180,
+    "MZE": 4070,
+    "MLT": 4130,
+    "OLP": 8100,
+    "OOC": 8100,
+    "OCE": 4040,
+    "OVG": 3650,
+    "PLS": 3930,
+    "RSD": 8100,
+    "RCW": 4130,
+    "SES": 6010,
+    "SRG": 3750,
+    "SOY": 4880,
+    "SUB": 3870,
+    "SUC": 3870,
+    "SFL": 6130,
+    "TOM": 4150,
+    "WHE": 3770,
+    "POT": 3630,
+    "ORT": 3880,
+}
+
+CROP_MAPPING = {
+    "theme5_code": {
+        "BAN": ["BAN"],
+        "BRL": ["BRL"],
+        "COC": ["COC"],
+        "COF": ["COF"],
+        "CON": ["CON"],
+        "COT": ["COT"],
+        "CSV": ["CSV"],
+        "FDD": ["ALF", "BCH", "BSG", "MIS", "MZS", "NAP", "RCG", "SWG"],
+        "FRT": ["CIT", "CSH", "MNG"],
+        "GRD": ["GRD"],
+        "MLT": ["FML", "PML"],
+        "MZE": ["MZE"],
+        "NES": ["ECN", "FLX"],
+        "OCE": ["BCK", "OAT", "RYE", "TRI"],
+        "OLP": ["OLP"],
+        "OOC": ["CAM", "CRT", "CST", "JTR", "MCA", "OLV", "SOL"],
+        "ORT": ["CYA", "YAM"],
+        "OVG": ["CAB", "CAR", "ONI"],
+        "PLS": ["CHK", "COW", "GRM", "PEA", "PHB", "PIG"],
+        "POT": ["SPO", "WPO"],
+        "RCW": ["RCD", "RCW"],
+        "RSD": ["RSD"],
+        "RUB": ["RUB"],
+        "SES": ["SES"],
+        "SFL": ["SFL"],
+        "SOY": ["SOY"],
+        "SRG": ["SRG"],
+        "SUB": ["SUB"],
+        "SUC": ["SUC"],
+        "TEA": ["TEA"],
+        "TOB": ["TOB"],
+        "TOM": ["TOM"],
+        "WHE": ["WHE"],
+    },
+    "theme2_code": {
+        "BAN": ["BANA"],
+        "BRL": ["BARL", "SBRL", "WBRL"],
+        "COC": ["COCC", "COCH", "COCO"],
+        "COF": ["COFA", "COFF", "COFR"],
+        "CON": ["COC1", "COC2", "COC3", "COCN"],
+        "COT": ["COTT"],
+        "CSV": ["CASV"],
+        "FDD": ["ALFA", "BHSG", "BLSG", "BRCH", "BSRG", "BTSG", "GRAS", "GRLG", "MISC", "MZSI", "NAPR", "RCGR", "SWGR"],
+        "FRT": ["CASH", "CITR", "MANG"],
+        "GRD": ["GRND"],
+        "MLT": ["FIMLT", "FMLT", "MLLT", "PMLT"],
+        "MZE": ["HMZE", "LMZE", "MAIZ", "TMZE"],
+        "NES": ["ECAN", "ECANV2", "ECANV3", "FLAX"],
+        "OCE": ["BCKW", "OATS", "RYES", "SRYE", "TEFF", "TRIT", "WRYE"],
+        "OLP": ["OILP"],
+        "OOC": ["CAME", "CAMSP", "CAMW", "CARI", "CARIS", "CARIW", "CAST", "JATR", "MCAU", "MCAU2", "OLIV", "SOLA"],
+        "ORT": ["CYAM1", "CYAM2", "CYAM3", "GYAM", "WYAM", "YAMS", "YYAM"],
+        "OVG": ["CABB", "CARR", "ONIO"],
+        "PLS": ["BEAN", "CHCK", "COWP", "DPEA", "GRAM", "PIGP"],
+        "POT": ["SPOT", "WPOT"],
+        "RCW": ["RICD", "RICW"],
+        "RSD": ["RAPE"],
+        "RUB": ["PRUB"],
+        "SES": ["SESA"],
+        "SFL": ["SUNF"],
+        "SOY": ["SOYB"],
+        "SRG": ["HSRG", "LSRG", "SORG", "TSRG"],
+        "SUB": ["SUGB"],
+        "SUC": ["SUGC"],
+        "TEA": ["TEAS"],
+        "TOB": ["TOBA"],
+        "TOM": ["TOMA"],
+        "WHE": ["SWHE", "WHEA", "WWHE"],
+    },
+}
@@ -1,17 +1,46 @@
 from pathlib import Path
+import contextlib
+import functools
+import json
+import os
+import tempfile
 import dask
+import dask.array
 import xarray as xr
 import rioxarray as rxr
 import rasterio
+import rasterio.shutil
+import numba
 import numpy as np
-import pandas as pd
+import tifffile
+import zarr
 import logging
+import threading
 import requests
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from rasterio.windows import Window
+from rioxarray.rioxarray import affine_to_coords
 
 RASTER_CACHE_DIR = Path("cache/rasters")
 OPEN_CHUNKS = {"y": 512, "x": 512}
 
+# Process-wide GDAL settings for (cloud-optimized) GeoTIFF reads. Exported as
+# environment variables once at import instead of entering a rasterio.Env per
+# open, so GDAL keeps its block/HTTP caches for the whole run and spawned dask
+# workers inherit the same settings. Values already set by the user win.
+GDAL_ENV = {
+    "GDAL_CACHEMAX": "512",                          # MB of decoded-block cache
+    "GDAL_DISABLE_READDIR_ON_OPEN": "EMPTY_DIR",     # no sidecar-file probing
+    "GDAL_HTTP_MERGE_CONSECUTIVE_RANGES": "YES",
+    "GDAL_INGESTED_BYTES_AT_OPEN": "393216",         # header + IFDs in one read
+    "CPL_VSIL_CURL_USE_HEAD": "NO",
+    "GDAL_HTTP_MULTIPLEX": "YES",
+    "GDAL_HTTP_VERSION": "2",
+    "CPL_VSIL_CURL_CACHE_SIZE": "200000000",         # shared /vsicurl/ block cache
+}
+for _k, _v in GDAL_ENV.items():
+    os.environ.setdefault(_k, _v)
+
 # Water-code mapping (yield water -> harvested-area water)
 YR_WATER_TO_AREA = {
     "HILM": "WSI",  # irrigated/high-input  -> irrigated harvested area
@@ -48,6 +77,23 @@ def gaezv5_path(variable_code,       # e.g. "RES05-YCX" or "RES03-YLD" or "RES06
 
 # ── Local raster cache ────────────────────────────────────────────────────────
 
+# One pooled connection per concurrent download/HEAD thread (see max_workers)
+HTTP_POOL_SIZE = 32
+
+
+@functools.lru_cache(maxsize=None)
+def _http_session() -> requests.Session:
+    """Process-wide session so downloads and HEAD checks reuse keep-alive
+    TLS connections to storage.googleapis.com instead of a new handshake
+    per request."""
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=HTTP_POOL_SIZE,
+                                            pool_maxsize=HTTP_POOL_SIZE)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
 def _local_cache_path(url: str) -> Path:
     """Deterministic local path for a remote raster URL."""
     parts = url.rstrip("/").split("/")
@@ -61,7 +107,7 @@ def _download_file(url: str, dest: Path) -> bool:
     dest.parent.mkdir(parents=True, exist_ok=True)
     tmp = dest.with_suffix(dest.suffix + ".tmp")
     try:
-        with requests.get(url, stream=True, timeout=120) as r:
+        with _http_session().get(url, stream=True, timeout=120) as r:
             r.raise_for_status()
             with open(tmp, "wb") as f:
                 for chunk in r.iter_content(chunk_size=131072):  # 128 KB
@@ -84,48 +130,255 @@ def _ensure_local(url: str) -> str:
     raise RuntimeError(f"Failed to download: {url}")
 
 
+def prefetch_rasters(urls, max_workers=16):
+    """Download remote rasters into the local cache in parallel, so building
+    the graph afterwards only opens local files. Returns the URLs that failed."""
+    missing = [u for u in set(urls) if not _local_cache_path(u).exists()]
+    if not missing:
+        return set()
+    logging.info(f"Prefetching {len(missing)} rasters …")
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        ok = dict(zip(missing, pool.map(lambda u: _download_file(u, _local_cache_path(u)), missing)))
+    failed = {u for u, success in ok.items() if not success}
+    if failed:
+        logging.warning(f"  {len(failed)} rasters failed to download")
+    return failed
+
+
+@functools.lru_cache(maxsize=None)
+def _block_shape(path: str):
+    with rasterio.open(path) as src:
+        return src.block_shapes[0]
+
+
+def block_aligned_chunks(path, target=None):
+    """Dask chunks that are whole multiples of the file's native block shape,
+    as close to `target` (default OPEN_CHUNKS) as possible. Misaligned chunks
+    make every dask chunk decode several partially used tiles."""
+    target = target or OPEN_CHUNKS
+    by, bx = _block_shape(str(path))
+    return {"y": by * max(1, target["y"] // by), "x": bx * max(1, target["x"] // bx)}
+
+
 def open_raster(url_or_path):
     """Open a raster. Remote URLs are downloaded to local cache first."""
     path = str(url_or_path)
     if path.startswith(("http://", "https://")):
         path = _ensure_local(path)
-    da = rxr.open_rasterio(path, masked=True, chunks=OPEN_CHUNKS).squeeze()
+    da = rxr.open_rasterio(path, masked=True, chunks=block_aligned_chunks(path)).squeeze()
     return da.astype("float32")
 
 
+def _tiff_zarr(path, fillvalue):
+    """Zarr view of the first page of a GeoTIFF, decoded by tifffile/imagecodecs,
+    or None if tifffile cannot decode its compression or predictor. The
+    TiffFile stays open for the lifetime of the returned array."""
+    tif = tifffile.TiffFile(path)
+    page = tif.pages[0]
+    if (page.compression not in tifffile.TIFF.DECOMPRESSORS
+            or page.predictor not in tifffile.TIFF.UNPREDICTORS):
+        tif.close()
+        return None
+    # missing (sparse) tiles read as nodata, or 0 if unset, as in GDAL
+    return zarr.open(tif.aszarr(key=0, fillvalue=fillvalue), mode="r")
+
+
+def open_local_raster(path, target=None):
+    """Open a local single-band GeoTIFF as a float32 (y, x) DataArray, masked.
+
+    Tiles (compressed or not, e.g. the ZSTD COGs written by write_rasters) are
+    decoded by tifffile through a zarr view, chunked to whole blocks, and only
+    the georef (transform, crs, nodata, band metadata) is read through
+    rasterio. Coords are built as rioxarray builds them, so layers opened here
+    and through the rasterio engine share the exact same grid. Multi-band,
+    rotated or undecodable files fall back to rioxarray."""
+    path = Path(path)
+    chunks = block_aligned_chunks(path, target)
+    with rasterio.open(path) as src:
+        transform, crs, nodata = src.transform, src.crs, src.nodata
+        count, height, width = src.count, src.height, src.width
+        attrs = {**src.tags(), **src.tags(1)}
+        if src.descriptions[0]:
+            attrs["long_name"] = src.descriptions[0]
+        if src.units[0]:
+            attrs["units"] = src.units[0]
+
+    arr = None
+    if count == 1 and transform.b == 0 and transform.d == 0:
+        arr = _tiff_zarr(path, nodata if nodata is not None else 0)
+    if arr is None or arr.shape != (height, width):
+        da = rxr.open_rasterio(path.as_posix(), masked=True, chunks=chunks).squeeze()
+        return da.astype("float32")
+
+    data = dask.array.from_array(arr, chunks=(chunks["y"], chunks["x"]))
+    coords = affine_to_coords(transform, width, height)
+    da = xr.DataArray(data, dims=("y", "x"), coords=coords, attrs=attrs)
+    if nodata is not None and not np.isnan(nodata):
+        da = da.where(da != nodata)
+    # Write the file's transform (and GeoTransform) explicitly: rebuilding it
+    # from the pixel-centre coords differs in the last bit, and match_grid
+    # would then warp every layer opened through the rasterio engine.
+    da = da.astype("float32").rio.write_crs(crs).rio.write_transform(transform)
+    return da.rio.write_nodata(nodata, encoded=True) if nodata is not None else da
+
+
+def clamp_to_zero(da):
+    """Set negative and NaN cells to 0 (same as ``da.where(da >= 0, 0)``)
+    in a single elementwise np.fmax pass, without a boolean mask."""
+    return xr.apply_ufunc(np.fmax, da, np.float32(0), dask="parallelized",
+                          output_dtypes=[np.float32], keep_attrs=True)
+
+
+# ── Windowed GeoTIFF writer ───────────────────────────────────────────────────
+
+class _WindowWriter:
+    """dask.array.store target that writes each stored block as a window.
+    Holds its own lock: one writer per file, files written concurrently."""
+
+    def __init__(self, dst):
+        self.dst = dst
+        self.lock = threading.Lock()
+
+    def __setitem__(self, key, block):
+        rows, cols = key
+        with self.lock:
+            self.dst.write(block.astype("float32"), 1, window=Window.from_slices(rows, cols))
+
+
+def _raster_source(da, blocksize):
+    """(dask array, rasterio profile, tags) for writing da as a staging GeoTIFF."""
+    nodata = da.rio.encoded_nodata if da.rio.encoded_nodata is not None else da.rio.nodata
+    if nodata is not None and not np.isnan(nodata):
+        da = da.fillna(nodata)
+
+    step = 2 * blocksize
+    data = da.chunk({da.dims[0]: step, da.dims[1]: step}).data
+    profile = dict(
+        driver="GTiff", count=1, dtype="float32", nodata=nodata,
+        height=da.shape[0], width=da.shape[1],
+        crs=da.rio.crs, transform=da.rio.transform(),
+        tiled=True, blockxsize=blocksize, blockysize=blocksize,
+        compress="ZSTD", zstd_level=1, predictor=3,   # fast: recompressed by _to_cog
+        num_threads="ALL_CPUS", bigtiff="IF_SAFER",
+        sparse_ok=True,          # keeps the staging file small; see _to_cog
+    )
+    tags = {k: str(v) for k, v in da.attrs.items() if not k.startswith("_")}
+    return data, profile, tags
+
+
+def _to_cog(src_path, dst_path, blocksize):
+    """Translate a tiled GeoTIFF into a ZSTD Cloud-Optimized GeoTIFF with
+    internal overviews (IFDs first, overviews built in the same copy).
+    Empty tiles (all nodata, or all zero if nodata is unset) are not written."""
+    rasterio.shutil.copy(
+        str(src_path), str(dst_path), driver="COG",
+        compress="ZSTD", level=5, predictor="FLOATING_POINT",
+        blocksize=blocksize, overviews="AUTO", overview_resampling="AVERAGE",
+        bigtiff="IF_SAFER", num_threads="ALL_CPUS", sparse_ok=True,
+    )
+
+
+def write_rasters(das, paths, blocksize=512):
+    """Write 2-D (y, x) DataArrays to ZSTD-compressed float32 COGs.
+
+    All staging files are opened up front and filled by a single
+    dask.array.store call: every chunk is written to its window as soon as it
+    is computed, and inputs shared between the graphs (e.g. the same area
+    tiles feeding several outputs) are read once. Chunks are rechunked to
+    whole tiles so no compressed tile is written twice. GDAL's COG driver
+    cannot be written window by window, so each staging GeoTIFF is then
+    translated to the final COG with overviews. Staging files live in a
+    hidden subdirectory, so leftovers from a killed run never match the
+    ``<prefix>_*.tif`` globs of the process_* scripts."""
+    paths = [Path(p) for p in paths]
+    sources = [_raster_source(da, blocksize) for da in das]
+    paths[0].parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory(prefix=".staging-", dir=paths[0].parent) as tmp_dir:
+        staging = [Path(tmp_dir) / f"{i}_{p.name}" for i, p in enumerate(paths)]
+        with contextlib.ExitStack() as stack:
+            targets = []
+            for da, (_, profile, tags), tmp in zip(das, sources, staging):
+                dst = stack.enter_context(rasterio.open(str(tmp), "w", **profile))
+                dst.update_tags(**tags)
+                if da.name is not None:  # band description, as rio.to_raster
+                    dst.set_band_description(1, str(da.name))
+                targets.append(_WindowWriter(dst))
+            dask.array.store([data for data, _, _ in sources], targets, lock=False)
+        for tmp, path in zip(staging, paths):
+            _to_cog(tmp, path, blocksize)
+    return paths
+
+
+def write_raster(da, path, blocksize=512):
+    """Write one DataArray, see write_rasters."""
+    return write_rasters([da], [path], blocksize)[0]
+
+
 # ── URL existence manifest ────────────────────────────────────────────────────
 
-def check_urls_exist(urls, max_workers=32):
+# Persistent {url: exists} index of the GAEZ v5 catalog. The release is static,
+# so a URL that answered 200 or 404 once never needs another HEAD request.
+URL_INDEX_PATH = RASTER_CACHE_DIR / "url_index.json"
+
+
+def _load_url_index() -> dict:
+    try:
+        return json.loads(URL_INDEX_PATH.read_text())
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _save_url_index(index: dict):
+    URL_INDEX_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp = URL_INDEX_PATH.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(index, indent=0, sort_keys=True))
+    tmp.replace(URL_INDEX_PATH)
+
+
+def check_urls_exist(urls, max_workers=HTTP_POOL_SIZE, refresh=False):
     """Check which URLs exist via concurrent HEAD requests.
-    URLs already in local cache are counted as existing without a network call.
+    URLs already in local cache are counted as existing without a network call,
+    and URLs recorded in the persistent URL index are answered from it unless
+    refresh=True. Fresh answers are merged into the index, never replace it.
     Returns the set of existing URLs."""
+    index = _load_url_index()
     existing = set()
     to_check = []
     for url in set(urls):
-        if _local_cache_path(url).exists():
+        if _local_cache_path(url).exists() or (not refresh and index.get(url) is True):
             existing.add(url)
-        else:
+        elif refresh or url not in index:
             to_check.append(url)
 
     if not to_check:
-        logging.info(f"URL manifest: all {len(existing)} URLs already cached locally")
+        logging.info(f"URL manifest: all {len(existing)} available URLs known from cache/index")
         return existing
 
-    logging.info(f"Checking {len(to_check)} URLs ({len(existing)} already cached) …")
+    logging.info(f"Checking {len(to_check)} URLs ({len(existing)} already cached or indexed) …")
 
     def _head(url):
         try:
-            r = requests.head(url, timeout=10, allow_redirects=True)
-            return url, r.status_code in (200, 206)
+            r = _http_session().head(url, timeout=10, allow_redirects=True)
         except Exception:
-            return url, False
+            return url, None  # transient: do not record in the index
+        if r.status_code in (200, 206):
+            return url, True
+        # Only 404 is a definitive miss; on GCS a 403 may be quota/billing/auth.
+        return url, False if r.status_code == 404 else None
 
+    n_checked = 0
     with ThreadPoolExecutor(max_workers=max_workers) as pool:
         futures = [pool.submit(_head, u) for u in to_check]
         for fut in as_completed(futures):
             url, ok = fut.result()
             if ok:
                 existing.add(url)
+            if ok is not None:
+                index[url] = ok
+                n_checked += 1
+
+    if n_checked:
+        _save_url_index(index)
 
     logging.info(f"  {len(existing)} of {len(existing | set(to_check))} URLs available")
     return existing
@@ -133,8 +386,23 @@ def check_urls_exist(urls, max_workers=32):
 
 # ── HAR raster preload cache ─────────────────────────────────────────────────
 
-def preload_har_cache(groups, waters):
+@functools.lru_cache(maxsize=None)
+def _load_area(group, area_water):
+    """Open the RES06-HAR raster of a group once per process.
+    The area depends only on (group, area water), so it is shared by every
+    period/model/scenario combination."""
+    a_path = gaezv5_path(
+        variable_code="RES06-HAR",
+        period=None, climate_model=None, scenario=None,
+        crop=group, water_code=area_water,
+    )
+    return open_raster(a_path)
+
+
+def preload_har_cache(groups, waters, persist=False):
     """Download and open all HAR rasters for given groups and water codes.
+    With persist=True the decoded rasters are pinned in (cluster) memory, so
+    repeated computes reuse them instead of re-decoding the GeoTIFF tiles.
     Returns dict keyed by (group, area_water) -> DataArray."""
     needed = {}
     for group in groups:
@@ -168,19 +436,49 @@ def preload_har_cache(groups, waters):
             logging.warning(f"Failed to preload HAR {key}: {err}")
             continue
         try:
-            cache[key] = open_raster(local_path)
+            cache[key] = _load_area(*key)
         except Exception as e:
             logging.warning(f"Failed to open HAR {key}: {e}")
 
+    if persist and cache:
+        keys = list(cache)
+        cache = dict(zip(keys, dask.persist(*(cache[k] for k in keys))))
+
     logging.info(f"  Loaded {len(cache)}/{len(needed)} HAR rasters into cache")
     return cache
 
 
+# ── Crop / calorie mappings ──────────────────────────────────────────────────
+# The CSVs in data/ are baked into src/_cal_mapping_generated.py by
+# tools/gen_cal_mapping.py, so a pipeline run needs neither pandas nor file IO
+# for them. Rerun `python -m tools.gen_cal_mapping` after editing a CSV.
+
+CAL_MAPPING_CSV = "data/gaezv5_cal_mapping.csv"
+CROP_MAPPING_CSV = "data/gaez_v5_crop_mapper.csv"
+CROP_CODE_COLS = ("theme5_code", "theme2_code")
+
+
+def _crop_code_col(variable_code):
+    return "theme5_code" if variable_code in ["RES05-YCX", "RES05-YXX"] else "theme2_code"
+
+
 def get_crop_mapping(variable_code):
+    from src._cal_mapping_generated import CROP_MAPPING
+    return {g: list(crops) for g, crops in CROP_MAPPING[_crop_code_col(variable_code)].items()}
+
+
+def get_cal_mapper(path=CAL_MAPPING_CSV):
+    if path == CAL_MAPPING_CSV:
+        from src._cal_mapping_generated import CAL_MAPPER
+        return dict(CAL_MAPPER)
+    return read_cal_mapper_csv(path)
+
 
-    path = "data/gaez_v5_crop_mapper.csv"
+def read_crop_mapping_csv(code_col, path=CROP_MAPPING_CSV):
+    import pandas as pd
 
-    crop_df = pd.read_csv(path).fillna("")
+    # pyarrow parses the CSV columnar; every column here is a string code
+    crop_df = pd.read_csv(path, engine="pyarrow", dtype_backend="pyarrow").fillna("")
 
     crop_df = crop_df[crop_df["mapping_note"].str.lower() != "unmapped"]
 
@@ -191,22 +489,20 @@ def get_crop_mapping(variable_code):
             crop_df[c] = crop_df[c].str.strip().str.upper()
 
 
-
-    code_col = "theme5_code" if variable_code in ["RES05-YCX", "RES05-YXX"] else "theme2_code"
-
-
+    # sort before grouping: groupby keeps row order, so each list comes out sorted
     out = (crop_df.loc[crop_df[code_col] != "", ["theme6_code", code_col]]
            .drop_duplicates()
+           .sort_values(code_col)
            .groupby("theme6_code")[code_col]
-           .apply(lambda s: sorted(s.unique()))
+           .agg(list)
            .to_dict())
     return out
 
 
-def get_cal_mapper(path="data/gaezv5_cal_mapping.csv"):
+def read_cal_mapper_csv(path=CAL_MAPPING_CSV):
+    import pandas as pd
 
-
-    df = pd.read_csv(path, dtype={"gaez_crop_code":"string"})
+    df = pd.read_csv(path, engine="pyarrow", dtype={"gaez_crop_code":"string"})
 
     df = df[df["crop_type"] == "grain"]
     df["gaez_crop_code"] = df["gaez_crop_code"].str.strip().str.upper()
@@ -218,28 +514,31 @@ def get_cal_mapper(path="data/gaezv5_cal_mapping.csv"):
     return dict(zip(df["gaez_crop_code"], df["cal_yld"]))
 
 
-def group_kcal_average(group, crops, kcal_per_kg,
-                       water_code, variable_code_yield, period, climate_model, scenario,
-                       har_cache=None, url_manifest=None,
-                       ):
-    # transform water / input to area water
-    area_water = YR_WATER_TO_AREA[water_code]
+def grid_key(da):
+    """(crs, transform, shape) of a raster, to compare grids in one test."""
+    return (da.rio.crs, da.rio.transform(), da.shape)
 
-    # Use cached HAR raster if available, otherwise open fresh
+
+def match_grid(da, ref, ref_key=None):
+    """Reproject da onto the grid of ref, unless it already matches.
+    Pass ref_key=grid_key(ref) when matching many layers to the same ref."""
+    if grid_key(da) != (ref_key or grid_key(ref)):
+        return da.rio.reproject_match(ref)
+    return da
+
+
+def _open_group_area(group, area_water, har_cache=None):
+    """Harvested-area raster of one Theme-6 group, from har_cache if possible."""
     if har_cache is not None and (group, area_water) in har_cache:
-        areaG = har_cache[(group, area_water)]
-    else:
-        a_path = gaezv5_path(
-            variable_code="RES06-HAR",
-            period=None, climate_model=None, scenario=None,
-            crop=group, water_code=area_water
-        )
-        areaG = open_raster(a_path)
+        return har_cache[(group, area_water)]
+    return _load_area(group, area_water)
 
 
+def _open_group_yields(group, crops, water_code, variable_code_yield,
+                       period, climate_model, scenario, url_manifest=None):
+    """Open the per-crop yield rasters of one group, skipping missing crops."""
     yld_ha_layers = []
-    ref = None
-    for c in crops:
+    for c in crops or []:
         y_path = gaezv5_path(
             variable_code=variable_code_yield,
             period=period,
@@ -259,21 +558,59 @@ def group_kcal_average(group, crops, kcal_per_kg,
         except Exception as e:
             logging.warning(f"[{group}] skipping crop={c} ({water_code}) – failed to open: {y_path} -> {e}")
             continue
+        yld_ha_layers.append(yld)
+    return yld_ha_layers
+
+
+@numba.njit(nogil=True, cache=True)
+def _kcal_kernel(yld, area, kcal):
+    """Single pass over a (y, x, crop) block: NaN-aware mean over crops,
+    times area and kcal/kg. Cells with no crop value stay NaN."""
+    H, W, C = yld.shape
+    out = np.empty((H, W), dtype=np.float32)
+    for i in range(H):
+        for j in range(W):
+            s = 0.0
+            n = 0
+            for k in range(C):
+                v = yld[i, j, k]
+                if not np.isnan(v):
+                    s += v
+                    n += 1
+            out[i, j] = (s / n) * area[i, j] * kcal if n else np.nan
+    return out
 
-        if ref is None:
-            ref = yld
-            areaG = areaG.rio.reproject_match(ref) if (
-                (areaG.rio.crs != ref.rio.crs) or (areaG.rio.transform()!=ref.rio.transform()) or (areaG.shape!=ref.shape)
-            ) else areaG
-        # per-crop kcal/ha = yld(t/ha)*1000 * kcal/kg
-        yld_ha_layers.append(yld.astype("float64"))
 
+def _kcal_layer(yld_ha_layers, areaG, kcal_per_kg):
+    """mean(crop) * area * kcal via _kcal_kernel, one dask task per (y, x) chunk."""
+    yld_stack = xr.concat(yld_ha_layers, dim="crop", coords="minimal", compat="override")
+    return xr.apply_ufunc(
+        _kcal_kernel, yld_stack.chunk({"crop": -1}), areaG, np.float32(kcal_per_kg),
+        input_core_dims=[["crop"], [], []],
+        dask="parallelized", output_dtypes=[np.float32],
+    )
+
+
+def group_kcal_average(group, crops, kcal_per_kg,
+                       water_code, variable_code_yield, period, climate_model, scenario,
+                       har_cache=None, url_manifest=None,
+                       ):
+    # transform water / input to area water
+    area_water = YR_WATER_TO_AREA[water_code]
+
+    # Use cached HAR raster if available, otherwise open fresh
+    areaG = _open_group_area(group, area_water, har_cache)
+
+    yld_ha_layers = _open_group_yields(group, crops, water_code, variable_code_yield,
+                                       period, climate_model, scenario, url_manifest)
     if not yld_ha_layers:
         return areaG * 0.0
 
-    # mean over crops present (uniform)
-    yield_ha_mean = xr.concat(yld_ha_layers, dim="crop").mean("crop", skipna=True)  # mean yield /ha
-    kcal_cell = yield_ha_mean * areaG * float(kcal_per_kg)               # kcal per cell
+    ref = yld_ha_layers[0]
+    areaG = match_grid(areaG, ref)
+    # per-crop kcal/ha = yld(t/ha)*1000 * kcal/kg; float32 throughout
+    # mean over crops present (uniform), times area -> kcal per cell
+    kcal_cell = _kcal_layer(yld_ha_layers, areaG, kcal_per_kg)
     kcal_cell.name = f"kcal_{group}"
     return kcal_cell
 
@@ -282,25 +619,40 @@ def sum_groups_kcal(crop_mapping, calorie_mapping,
                     water_code, variable_code_yield,
                     period, climate_model, scenario,
                     har_cache=None, url_manifest=None):
+    """Total kcal per cell over all groups.
+
+    Every layer is aligned to one reference grid, and the per-group
+    ``mean(crop) * area * kcal`` layers are folded into a running sum so no
+    (group, y, x) array is ever built.
+    """
+    groups = list(calorie_mapping)
+    if not groups:
+        raise RuntimeError("No group layers produced")
+    area_water = YR_WATER_TO_AREA[water_code]
+
+    yld_by_group = {
+        g: _open_group_yields(g, crop_mapping.get(g), water_code, variable_code_yield,
+                              period, climate_model, scenario, url_manifest)
+        for g in groups
+    }
+    area_by_group = {g: _open_group_area(g, area_water, har_cache) for g in groups}
+
+    # single reference grid for every layer
+    ref = next((layers[0] for layers in yld_by_group.values() if layers), area_by_group[groups[0]])
+    ref_key = grid_key(ref)
 
     total_kcal = None
-    for group_crop, kcal in calorie_mapping.items():
-        crops = crop_mapping.get(group_crop)
-
-        layer = group_kcal_average(group=group_crop, crops=crops, kcal_per_kg=kcal,
-                                   variable_code_yield=variable_code_yield,
-                                   period=period, climate_model=climate_model,
-                                   scenario=scenario, water_code=water_code,
-                                   har_cache=har_cache, url_manifest=url_manifest)
-        # Running sum avoids building a large concatenated array
-        if total_kcal is None:
-            total_kcal = layer.fillna(0)
-        else:
-            total_kcal = total_kcal + layer.fillna(0)
+    for g in groups:
+        layers = [match_grid(y, ref, ref_key) for y in yld_by_group[g]]
+        if not layers:
+            continue  # no yields for this group: contributes 0
+        areaG = match_grid(area_by_group[g], ref, ref_key)
+        layer = _kcal_layer(layers, areaG, calorie_mapping[g]).fillna(0)
+        total_kcal = layer if total_kcal is None else total_kcal + layer
 
     if total_kcal is None:
-        raise RuntimeError("No group layers produced")
+        total_kcal = xr.zeros_like(ref)
+    total_kcal = total_kcal.rio.write_crs(ref.rio.crs)
 
     total_kcal.name = f"cal_yld_{variable_code_yield}_{period}_{climate_model}_{scenario}_{water_code}"
     return total_kcal
-
@@ -0,0 +1,42 @@
+"""Regenerate src/_cal_mapping_generated.py from the mapping CSVs in data/.
+
+Run from the repo root after editing data/gaezv5_cal_mapping.csv or
+data/gaez_v5_crop_mapper.csv:
+
+    python -m tools.gen_cal_mapping
+"""
+from pathlib import Path
+
+from src.utils import (CAL_MAPPING_CSV, CROP_MAPPING_CSV, CROP_CODE_COLS,
+                       read_cal_mapper_csv, read_crop_mapping_csv)
+
+OUT_PY = Path("src/_cal_mapping_generated.py")
+
+HEADER = f'''\
+# Generated by tools/gen_cal_mapping.py from {CAL_MAPPING_CSV} and
+# {CROP_MAPPING_CSV} -- do not edit by hand; rerun the generator instead.
+'''
+
+
+def render(cal_mapper, crop_mappings):
+    lines = [HEADER, "CAL_MAPPER = {"]
+    lines += [f"    {k!r}: {v!r}," for k, v in cal_mapper.items()]
+    lines += ["}", "", "CROP_MAPPING = {"]
+    for code_col, mapping in crop_mappings.items():
+        lines.append(f"    {code_col!r}: {{")
+        lines += [f"        {k!r}: {list(v)!r}," for k, v in mapping.items()]
+        lines.append("    },")
+    lines.append("}")
+    return "\n".join(lines).replace("'", '"') + "\n"
+
+
+def main():
+    cal_mapper = {k: int(v) if float(v).is_integer() else float(v)
+                  for k, v in read_cal_mapper_csv(CAL_MAPPING_CSV).items()}
+    crop_mappings = {c: read_crop_mapping_csv(c, CROP_MAPPING_CSV) for c in CROP_CODE_COLS}
+    OUT_PY.write_text(render(cal_mapper, crop_mappings))
+    print(f"wrote: {OUT_PY}")
+
+
+if __name__ == "__main__":
+    main()